@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, abort
+from flask import Flask, current_app, render_template, request, redirect, url_for, session, jsonify, abort
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
@@ -7,31 +7,104 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from sqlalchemy import MetaData, or_
 from random import randint
-from flask_cors import CORS
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+import click
 import logging
 import os
+import sys
+import threading
+import time
 import traceback
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///site.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.secret_key = os.getenv('SECRET_KEY', 'default-secret-key')
-db = SQLAlchemy(app)
+# Risk scores and transaction errors, written to transaction.log by configure_logging()
+logger = logging.getLogger('transaction')
+
+# Extensions are bound to the app in create_app() so that importing this
+# module stays cheap for autoscaled workers
+db = SQLAlchemy()
+
+# Routes registered by the @route decorator, added to the app in create_app()
+_routes = []
+
+def route(rule, **options):
+    def decorator(view_func):
+        _routes.append((rule, view_func, options))
+        return view_func
+    return decorator
+
+def configure_logging():
+    """Configure logging once, however many apps are created.
+
+    The root logger keeps printing errors and Werkzeug's output to stderr;
+    transaction events go to transaction.log, with errors also on stderr.
+    """
+    logging.basicConfig(level=logging.ERROR)
+
+    if logger.handlers:
+        return
+    file_handler = logging.FileHandler('transaction.log')
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.ERROR)
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def create_app(config=None):
+    """Application factory for the CMS."""
+    # Deferred imports: only needed once an app is actually being built
+    from dotenv import load_dotenv
+    from flask_cors import CORS
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
+
+    # Load environment variables
+    load_dotenv()
+    configure_logging()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///site.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.secret_key = os.getenv('SECRET_KEY', 'default-secret-key')
+    app.config['WARM_UP'] = True
+    app.config['WARM_UP_RETRY_INTERVAL'] = 1.0
+    app.config['WARM_UP_MAX_RETRY_INTERVAL'] = 30.0
+    if config:
+        app.config.update(config)
+    db.init_app(app)
+
+    # Initialize CORS
+    CORS(app)
+
+    # Initialize the Limiter
+    Limiter(app, key_func=get_remote_address)
+
+    for rule, view_func, options in _routes:
+        app.add_url_rule(rule, view_func=view_func, **options)
+
+    # Set once warm-up has completed; reported by /readyz
+    app.extensions['warm_up'] = threading.Event()
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create the database schema."""
+        init_db(app)
+        print('Initialized the database.')
+
+    if app.config['WARM_UP']:
+        if click.get_current_context(silent=True) is None:
+            start_warm_up(app)
+        else:
+            # Loaded by the flask CLI: only warm up if the app is actually
+            # served (flask run), not for one-shot commands like init-db
+            app.before_first_request(lambda: start_warm_up(app))
 
-# Initialize CORS
-CORS(app)
+    return app
 
-# Initialize the Limiter
-limiter = Limiter(app)
-limiter.init_app(app)
-#limiter.key_loader(get_remote_address)
-logging.basicConfig(level=logging.ERROR)
+def init_db(app):
+    """One-shot schema initialization; run once per deploy, not on every worker start."""
+    with app.app_context():
+        db.create_all()
 
 # Bin model
 class Bin(db.Model):
@@ -79,7 +152,7 @@ class Transaction(db.Model):
 
     @staticmethod
     def is_suspicious(transaction, max_cvv_attempts=3):
-        with app.app_context():
+        with current_app.app_context():
             # Check for too many unsuccessful CVV attempts
             unsuccessful_cvv_attempts = Transaction.query.filter(
                 Transaction.card_number == transaction.card_number,
@@ -164,13 +237,13 @@ def is_logged_in():
     return 'user_id' in session
 
 
-@app.route('/')
+@route('/')
 def login():
     if is_logged_in():
         return redirect(url_for('dashboard'))
     return render_template('login.html')
 
-@app.route('/login', methods=['POST'])
+@route('/login', methods=['POST'])
 def do_login():
     username = request.form['username']
     password = request.form['password']
@@ -183,7 +256,7 @@ def do_login():
     else:
         return render_template('login.html', error='Invalid credentials')
 
-@app.route('/logout', methods=['POST'])
+@route('/logout', methods=['POST'])
 def logout():
     # Check if the user is logged in
     if 'user_id' in session:
@@ -194,13 +267,13 @@ def logout():
     else:
         return 'User is not logged in'
 
-@app.route('/dashboard')
+@route('/dashboard')
 def dashboard():
     if not is_logged_in():
         return redirect(url_for('login'))
     return render_template('dashboard.html')
 
-@app.route('/bin_adding', methods=['GET', 'POST'])
+@route('/bin_adding', methods=['GET', 'POST'])
 def bin_adding():
     if not is_logged_in():
         return redirect(url_for('login'))
@@ -238,7 +311,7 @@ def bin_adding():
 
     return render_template('bin_adding.html')
 
-@app.route('/track_transactions')
+@route('/track_transactions')
 def track_transactions():
     if not is_logged_in():
         return redirect(url_for('login'))
@@ -248,7 +321,7 @@ def track_transactions():
 
     return render_template('track_transactions.html', bins=bins)
 
-@app.route('/card_generation', methods=['GET', 'POST'])
+@route('/card_generation', methods=['GET', 'POST'])
 def card_generation():
     if not is_logged_in():
         return redirect(url_for('login'))
@@ -300,7 +373,7 @@ def card_generation():
     return render_template('card_generation.html', bins=bins, message=message)
 
 # Balance Adding route
-@app.route('/balance_adding', methods=['GET', 'POST'])
+@route('/balance_adding', methods=['GET', 'POST'])
 def balance_adding():
     if not is_logged_in():
         return redirect(url_for('login'))
@@ -339,8 +412,6 @@ def balance_adding():
     
 ############ Custom Crafted AI Risk Calclation ###########
 # Enhanced AI algorithm for risk calculation
-logging.basicConfig(filename='transaction.log', level=logging.INFO, format='%(asctime)s - %(message)s')
-
 def calculate_transaction_risk(card, amount, cvv_attempts, transactions_in_last_second, country, card_holder_age):
     # Initialize risk score
     risk_score = 0
@@ -372,7 +443,7 @@ def calculate_transaction_risk(card, amount, cvv_attempts, transactions_in_last_
         risk_score += 20  # Very high risk for transactions flagged as suspicious by the fraud detection system
 
     # Log the risk score
-    logging.info(f"Transaction Risk Score: {risk_score}")
+    logger.info(f"Transaction Risk Score: {risk_score}")
 
     # Add more complex and overlapping conditions as needed based on specific business rules and requirements
 
@@ -381,7 +452,7 @@ def calculate_transaction_risk(card, amount, cvv_attempts, transactions_in_last_
 ############   API   ##########
 # API Endpoint - Create Transaction
 # Inside your API endpoint where you create a new transaction
-@app.route('/api/create_transaction', methods=['POST'])
+@route('/api/create_transaction', methods=['POST'])
 def create_transaction():
     try:
         data = request.get_json()
@@ -391,7 +462,7 @@ def create_transaction():
         for field in required_fields:
             if field not in data:
                 error_message = f'Missing required field: {field}'
-                logging.error(error_message)
+                logger.error(error_message)
                 return jsonify({'error': error_message}), 400
 
         card_number = data['card_number']
@@ -409,7 +480,7 @@ def create_transaction():
         else:
             # Handle the case when card_number is not found in the database
             error_message = f'Card not found for card_number: {card_number}'
-            logging.error(error_message)
+            logger.error(error_message)
             return jsonify({'error': error_message}), 404
             
         if card is not None:
@@ -419,12 +490,12 @@ def create_transaction():
         card = Card.query.filter_by(card_number=card_number).first()
         if not card:
             error_message = 'Invalid Card Number'
-            logging.error(error_message)
+            logger.error(error_message)
             return jsonify({'error': error_message}), 400
         
         if card.cvv != cvv:
             error_message = 'CVV Wrong Attempts +1'
-            logging.error(error_message)
+            logger.error(error_message)
             # Increment CVV attempts
             card.cvv_attempts += 1
             # Check if CVV attempts exceed the limit
@@ -440,26 +511,26 @@ def create_transaction():
         card = Card.query.filter_by(card_number=card_number).first()
         if not card or card.cvv != cvv:
             error_message = 'Invalid card or CVV'
-            logging.error(error_message)
+            logger.error(error_message)
             return jsonify({'error': error_message}), 400
 
         # Check if card status is "Dead"
         if card.status == "Dead":
             error_message = 'Card status is "Dead". Transaction failed.'
-            logging.error(error_message)
+            logger.error(error_message)
             return jsonify({'error': error_message}), 400
 
         # Check if card is expired
         current_date = datetime.utcnow()
         if card.expiry_year < current_date.year or (card.expiry_year == current_date.year and card.expiry_month < current_date.month):
             error_message = 'Card is expired. Transaction failed.'
-            logging.error(error_message)
+            logger.error(error_message)
             return jsonify({'error': error_message}), 400
 
         # Check if requested amount exceeds available balance
         if amount > float(card.balance):  # Convert card.balance to float
             error_message = 'Insufficient funds. Transaction failed.'
-            logging.error(error_message)
+            logger.error(error_message)
             return jsonify({'error': error_message}), 400
 
         # Obtain client's IP address
@@ -525,12 +596,12 @@ def create_transaction():
 
         # Log the exception with traceback for debugging
         error_message = f"Error creating transaction: {str(e)}\n{error_traceback}"
-        logging.error(error_message)
+        logger.error(error_message)
 
         return jsonify({'error': 'Internal server error'}), 500
 
 # API Endpoint - Transaction History
-@app.route('/api/transaction_history', methods=['GET'])
+@route('/api/transaction_history', methods=['GET'])
 def transaction_history():
     try:
         # Pagination parameters
@@ -546,10 +617,71 @@ def transaction_history():
 
     except Exception as e:
         # Log the exception for debugging
-        app.logger.error(f"Error retrieving transaction history: {str(e)}")
+        current_app.logger.error(f"Error retrieving transaction history: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
-if __name__ == '__main__':
+############   Health   ##########
+def warm_up(app):
+    """Prime the card lookup and velocity query paths before taking traffic.
+
+    Configures the mappers, opens a pooled connection and runs the same
+    queries create_transaction issues, so the first real transaction does
+    not pay for them.
+    """
     with app.app_context():
-        db.create_all()
+        db.session.execute(db.text('SELECT 1'))
+        Card.query.filter_by(card_number='').first()
+        Transaction.query.filter(
+            Transaction.card_number == '',
+            Transaction.timestamp >= (datetime.utcnow() - timedelta(seconds=1))
+        ).count()
+        db.session.remove()
+
+def start_warm_up(app):
+    """Warm up the worker in a background thread, retrying with backoff until it succeeds.
+
+    create_app() calls this for every worker. When the app is built once in a
+    parent process and forked (e.g. gunicorn --preload), create it with
+    WARM_UP=False and call this from the post_fork hook instead, since the
+    thread does not survive the fork.
+    """
+    def run():
+        interval = app.config['WARM_UP_RETRY_INTERVAL']
+        attempts = 0
+        while True:
+            try:
+                warm_up(app)
+                app.extensions['warm_up'].set()
+                return
+            except Exception as e:
+                attempts += 1
+                if attempts == 1:
+                    logging.error(f"Warm-up failed, retrying: {str(e)}")
+                else:
+                    logging.warning(f"Warm-up still failing after {attempts} attempts, retrying in {interval:g}s")
+                time.sleep(interval)
+                interval = min(interval * 2, app.config['WARM_UP_MAX_RETRY_INTERVAL'])
+
+    thread = threading.Thread(target=run, name='cms-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+# Liveness probe - the worker process is up and serving requests
+@route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({'status': 'alive'}), 200
+
+# Readiness probe - warm-up against the database has completed
+@route('/readyz', methods=['GET'])
+def readyz():
+    if not current_app.extensions['warm_up'].is_set():
+        return jsonify({'status': 'not ready'}), 503
+    return jsonify({'status': 'ready'}), 200
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['init-db']:
+        init_db(create_app({'WARM_UP': False}))
+        print('Initialized the database.')
+    else:
+        app = create_app()
         app.run(debug=os.getenv('FLASK_DEBUG', False))
@@ -1,31 +1,74 @@
-from flask import Flask, render_template, request, jsonify
-from flask_cors import CORS
+from flask import Flask, current_app, render_template, request, jsonify
 import requests
 import os
 import re
 import json
 import logging
+import threading
 from logging.handlers import RotatingFileHandler
+from urllib.parse import urlsplit, urlunsplit
 
 class CustomError(Exception):
     pass
 
-app = Flask(__name__)
-CORS(app)
-
 # Configuration
 API_URL = os.getenv('API_URL', 'http://localhost:5000/api/create_transaction')
 REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', 5))
-
-# Configure logging
-handler = RotatingFileHandler('transaction_server.log', maxBytes=10000, backupCount=3)
-logging_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-handler.setFormatter(logging_format)
-app.logger.addHandler(handler)
-app.logger.setLevel(logging.INFO)
+# CMS readiness endpoint checked by /readyz, on the same host as API_URL by default
+CMS_READY_URL = os.getenv('CMS_READY_URL', urlunsplit(urlsplit(API_URL)[:2] + ('/readyz', '', '')))
+# Kept well below typical orchestrator probe timeouts
+READY_TIMEOUT = float(os.getenv('READY_TIMEOUT', 1))
+
+# Routes registered by the @route decorator, added to the app in create_app()
+_routes = []
+
+def route(rule, **options):
+    def decorator(view_func):
+        _routes.append((rule, view_func, options))
+        return view_func
+    return decorator
+
+def create_app(config=None):
+    """Application factory for the transaction server."""
+    # Deferred import: only needed once an app is actually being built
+    from flask_cors import CORS
+
+    app = Flask(__name__)
+    if config:
+        app.config.update(config)
+    CORS(app)
+
+    # Configure logging; app.logger is shared by every app created here
+    if not any(isinstance(h, RotatingFileHandler) for h in app.logger.handlers):
+        handler = RotatingFileHandler('transaction_server.log', maxBytes=10000, backupCount=3)
+        logging_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        handler.setFormatter(logging_format)
+        app.logger.addHandler(handler)
+    app.logger.setLevel(logging.INFO)
+
+    for rule, view_func, options in _routes:
+        app.add_url_rule(rule, view_func=view_func, **options)
+
+    app.after_request(apply_security_headers)
+    app.register_error_handler(404, page_not_found)
+    app.register_error_handler(500, internal_server_error)
+    app.register_error_handler(CustomError, handle_custom_error)
+
+    # One pooled HTTP session per request thread; requests.Session is not thread-safe
+    app.extensions['http_sessions'] = threading.local()
+    # Last readiness result, so probe failures are only logged when it changes
+    app.extensions['cms_ready'] = None
+
+    return app
+
+def get_http_session():
+    """Return this thread's pooled HTTP session to the CMS API, creating it on first use."""
+    sessions = current_app.extensions['http_sessions']
+    if not hasattr(sessions, 'session'):
+        sessions.session = requests.Session()
+    return sessions.session
 
 # Security headers
-@app.after_request
 def apply_security_headers(response):
     #response.headers['Content-Security-Policy'] = "default-src 'self'"
     response.headers['X-Content-Type-Options'] = 'nosniff'
@@ -34,11 +77,11 @@ def apply_security_headers(response):
     response.headers.pop('Server', None)  # Remove the Server header
     return response
 
-@app.route('/')
+@route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/issue_transaction', methods=['POST'])
+@route('/issue_transaction', methods=['POST'])
 def issue_transaction():
     try:
         card_number = request.form.get('card_number')
@@ -57,27 +100,27 @@ def issue_transaction():
             "amount": amount
         }
 
-        response = requests.post(API_URL, json=data, headers={'Content-Type': 'application/json'}, timeout=REQUEST_TIMEOUT)
+        response = get_http_session().post(API_URL, json=data, headers={'Content-Type': 'application/json'}, timeout=REQUEST_TIMEOUT)
 
         if response.status_code == 201:
-            app.logger.info('Transaction issued successfully')
+            current_app.logger.info('Transaction issued successfully')
             return jsonify({'message': 'Transaction issued successfully'})
         else:
             error_detail = response.text if response.text else "No detailed error message provided."
             error_message = f'Failed to issue transaction: Status code {response.status_code}, Detail: {error_detail}' #Detail: {error_detail}
-            app.logger.error(error_message)
+            current_app.logger.error(error_message)
             return jsonify({'error': error_message}), response.status_code
 
     except CustomError as e:
-        app.logger.error(f'Input validation error: {str(e)},')
+        current_app.logger.error(f'Input validation error: {str(e)},')
         return jsonify({'error': str(e)}), 400
     except requests.RequestException as e:
         error_message = f'Network error: {str(e)}'
-        app.logger.error(error_message)
+        current_app.logger.error(error_message)
         return jsonify({'error': error_message}), 500
     except Exception as e:
         error_message = f'Unexpected error: {str(e)}'
-        app.logger.error(error_message)
+        current_app.logger.error(error_message)
         return jsonify({'error': error_message}), 500
 
 # Function to validate card number, expiry date, and CVV
@@ -90,18 +133,44 @@ def validate_card_info(card_number, expiry_date, cvv):
         raise CustomError('Invalid CVV format')
 
 # Custom error handlers
-@app.errorhandler(404)
 def page_not_found(e):
     return jsonify({'error': 'Page not found'}), 404
 
-@app.errorhandler(500)
 def internal_server_error(e):
     return jsonify({'error': 'Internal server error'}), 500
 
-@app.errorhandler(CustomError)
 def handle_custom_error(e):
     return jsonify({'error': str(e)}), 400
 
+############   Health   ##########
+# Liveness probe - the worker process is up and serving requests
+@route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({'status': 'alive'}), 200
+
+# Readiness probe - the CMS API this server forwards transactions to is ready
+@route('/readyz', methods=['GET'])
+def readyz():
+    try:
+        response = get_http_session().get(CMS_READY_URL, timeout=READY_TIMEOUT)
+        error = None if response.status_code == 200 else f'Status code {response.status_code}'
+    except requests.RequestException as e:
+        error = str(e)
+
+    # Only log transitions, so a probe every few seconds does not flood the log
+    ready = error is None
+    previous = current_app.extensions['cms_ready']
+    current_app.extensions['cms_ready'] = ready
+    if not ready and previous is not False:
+        current_app.logger.warning(f'CMS readiness check failed: {error}')
+    elif ready and previous is False:
+        current_app.logger.info('CMS readiness check passed again')
+
+    if not ready:
+        return jsonify({'status': 'not ready'}), 503
+    return jsonify({'status': 'ready'}), 200
+
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context():
         app.run(debug=os.getenv('FLASK_DEBUG', 'False') == 'False', port=5002)
@@ -0,0 +1,105 @@
+"""Startup-time benchmark for the CMS and TXN workers.
+
+Each run starts a fresh interpreter and records, in milliseconds:
+  import - importing the module
+  app    - building the app with create_app()
+  ready  - until /readyz first returns 200 (includes warm-up)
+
+TXN is only ready once the CMS it forwards to is reachable, so a CMS server
+is started in the background for those runs.
+
+Usage: python bench_startup.py [runs] [ready timeout in seconds]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Executed in a fresh interpreter so nothing is already imported or cached
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+module = __import__(sys.argv[1])
+imported = time.perf_counter()
+app = module.create_app()
+created = time.perf_counter()
+client = app.test_client()
+deadline = time.monotonic() + float(sys.argv[2])
+while True:
+    response = client.get('/readyz')
+    if response.status_code == 200:
+        break
+    if time.monotonic() > deadline:
+        sys.exit(f"/readyz not ready after {sys.argv[2]}s: {response.status_code} {response.get_data(as_text=True)}")
+    time.sleep(0.01)
+ready = time.perf_counter()
+print(json.dumps({
+    'import': (imported - start) * 1000,
+    'app': (created - imported) * 1000,
+    'ready': (ready - start) * 1000,
+}))
+'''
+
+def run_once(module, env, ready_timeout, cwd):
+    try:
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE, module, str(ready_timeout)],
+            env=env, cwd=cwd, capture_output=True, text=True, check=True,
+            timeout=ready_timeout + 30
+        )
+    except subprocess.TimeoutExpired:
+        sys.exit(f"{module}: probe did not finish within {ready_timeout + 30}s")
+    except subprocess.CalledProcessError as e:
+        sys.exit(f"{module}: {e.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def start_cms_server(database_uri):
+    """Serve the CMS on an ephemeral local port and return its base URL."""
+    from werkzeug.serving import make_server
+    import logging
+    import CMS
+
+    # Keep the access log of the background server out of the results
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    app = CMS.create_app({'SQLALCHEMY_DATABASE_URI': database_uri})
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    ready_timeout = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    # Everything runs from a temporary directory so the log files the
+    # workers write do not end up in the working tree
+    with tempfile.TemporaryDirectory() as tmp:
+        database_uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env = dict(os.environ, DATABASE_URI=database_uri, PYTHONPATH=ROOT)
+
+        # Schema init is a one-shot deploy step, so it is kept out of the timings
+        subprocess.run([sys.executable, os.path.join(ROOT, 'CMS.py'), 'init-db'], env=env, cwd=tmp,
+                       check=True, capture_output=True, timeout=60)
+
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            cms_url = start_cms_server(database_uri)
+        finally:
+            os.chdir(cwd)
+        env['API_URL'] = f"{cms_url}/api/create_transaction"
+
+        for module in ('CMS', 'TXN'):
+            samples = [run_once(module, env, ready_timeout, tmp) for _ in range(runs)]
+            print(f"{module} ({runs} runs)")
+            for phase in ('import', 'app', 'ready'):
+                values = [sample[phase] for sample in samples]
+                print(f"  {phase:<7} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+
+if __name__ == '__main__':
+    main()